@@ -1,25 +1,36 @@
-from nfl_data_loader.utils.utils import get_seasons_to_update, put_dataframe
+import argparse
+import datetime
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-from src.pipelines.events.event_regular_season_game import make_event_regular_season_feature_store
-from src.pipelines.fantasy.fantasy_football import make_fantasy_feature_store
-#from src.pipelines.players.player_regular_season_game import make_off_player_regular_season_feature_store
+from src.utils import get_seasons_to_update, parse_seasons, season_range
+
+## Builders are registered by import path and only imported once their store has seasons to update.
+## The pipelines pull in nfl_data_loader, pandas and scikit-learn (~seconds), so a no-op run or a --plan
+## stays on the standard library.
 
 event_meta = {
     "name":'event/regular_season_game',
     "start_season": 2002,
-    "obj": make_event_regular_season_feature_store
+    "obj": 'src.pipelines.events.event_regular_season_game.make_event_regular_season_feature_store'
     }
 """
 player_off = {
     "name":'player/off/regular_season_game',
     "start_season": 2002,
-    "obj": make_off_player_regular_season_feature_store
+    "obj": 'src.pipelines.players.player_regular_season_game.make_off_player_regular_season_feature_store'
     }
 """
 fantasy = {
     "name":'player/fantasy',
     "start_season": 2019,
-    "obj": make_fantasy_feature_store
+    "obj": 'src.pipelines.fantasy.fantasy_football.make_fantasy_feature_store'
     }
 FEATURE_STORE_METAS = [
     event_meta,
@@ -27,32 +38,247 @@ FEATURE_STORE_METAS = [
     fantasy
 ]
 
+ROOT_PATH = './data/feature_store'
+RUN_REPORT_ROOT = './data/run_reports'
+# Number of previous run reports kept and averaged for the plan estimates
+ESTIMATE_REPORTS = 5
+# pyarrow releases the GIL while encoding/writing so season writes can overlap in threads
+WRITE_WORKERS = 4
+
+
+def load_builder(import_path):
+    """
+    Import a builder from its 'package.module.function' path.
+    """
+    module_name, function_name = import_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def write_seasons(fs_df, root_path, feature_store_name, update_seasons, max_workers=WRITE_WORKERS):
+    from nfl_data_loader.utils.utils import put_dataframe
+
+    def _put(season):
+        put_dataframe(fs_df[fs_df.season == season].copy(), f"{root_path}/{feature_store_name}/{season}.parquet")
+        return season
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # list() so any write error is raised here
+        return list(executor.map(_put, update_seasons))
+
+
+def plan_feature_store(fs_meta_obj, root_path=ROOT_PATH, seasons=None):
+    """
+    Decide the seasons to write, the mode and the seasons to load for a store without building anything.
+    seasons overrides the seasons picked by get_seasons_to_update.
+    """
+    feature_store_name = fs_meta_obj['name']
+    start_season = fs_meta_obj['start_season']
+    ## Determine pump mode
+    update_seasons = list(seasons) if seasons else get_seasons_to_update(root_path, feature_store_name)
+    if min(update_seasons) < start_season:
+        update_seasons = [i for i in update_seasons if i >= start_season]
+    if not update_seasons:
+        return {'name': feature_store_name, 'mode': 'skip', 'update_seasons': [], 'load_seasons': []}
+
+    mode = 'refresh' if start_season in update_seasons else 'upsert'
+
+    # Use the last season for aggregate stats for upsert mode
+    load_seasons = update_seasons if mode == 'refresh' else list(range(min(update_seasons) - 1, max(update_seasons)+1))
+    return {'name': feature_store_name, 'mode': mode, 'update_seasons': update_seasons, 'load_seasons': load_seasons}
+
+
+def _run_report_path(feature_store_name, report_root=RUN_REPORT_ROOT):
+    return f"{report_root}/{feature_store_name}.jsonl"
+
+
+def put_run_report(report, report_root=RUN_REPORT_ROOT):
+    """
+    Append a run report, keeping only the last ESTIMATE_REPORTS (the reports are committed by the nightly workflow).
+    """
+    reports = (get_run_reports(report['name'], report_root) + [report])[-ESTIMATE_REPORTS:]
+    path = _run_report_path(report['name'], report_root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(existing) + '\n' for existing in reports)
+
+
+def get_run_reports(feature_store_name, report_root=RUN_REPORT_ROOT):
+    path = _run_report_path(feature_store_name, report_root)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
 
+def estimate_run(feature_store_name, n_load_seasons, report_root=RUN_REPORT_ROOT):
+    """
+    Estimated seconds and MB for loading n seasons, scaled from the per season cost of the latest run reports.
+    """
+    reports = get_run_reports(feature_store_name, report_root)[-ESTIMATE_REPORTS:]
+    if not reports:
+        return None
+    loaded = sum(report['n_load_seasons'] for report in reports)
+    return {
+        'seconds': round(sum(report['build_seconds'] + report['write_seconds'] for report in reports) / loaded * n_load_seasons, 1),
+        'memory_mb': round(sum(report['memory_mb'] for report in reports) / loaded * n_load_seasons, 1),
+        'n_reports': len(reports),
+    }
+
+
+def print_plan(plans, root_path=ROOT_PATH, report_root=RUN_REPORT_ROOT):
+    print("Feature Store Plan:")
+    for plan in plans:
+        name = plan['name']
+        stored = [season for season in plan['update_seasons'] if os.path.exists(f"{root_path}/{name}/{season}.parquet")]
+        new = [season for season in plan['update_seasons'] if season not in stored]
+        print(f"    {name} ({plan['mode']})")
+        if not plan['update_seasons']:
+            print("        nothing to write")
+            continue
+        estimate = estimate_run(name, len(plan['load_seasons']), report_root)
+        print(f"        loads: {min(plan['load_seasons'])}-{max(plan['load_seasons'])} ({len(plan['load_seasons'])} seasons)")
+        print(f"        writes: {plan['update_seasons']}")
+        print(f"        seasons: {len(stored)} already stored / {len(new)} new (overwrites: {stored}, new: {new})")
+        # Upstream pbp/schedules come from nfl_data_loader which keeps no local cache
+        print(f"        upstream: {len(plan['load_seasons'])} seasons fetched (nfl_data_loader, no local cache)")
+        if estimate is None:
+            print(f"        estimate: unknown (no run reports in {report_root})")
+        else:
+            print(f"        estimate: ~{estimate['seconds']}s, ~{estimate['memory_mb']} MB (from {estimate['n_reports']} runs)")
+
+
+def run_feature_store(fs_meta_obj, root_path=ROOT_PATH, allow_schema_drift=False, seasons=None):
+    plan = plan_feature_store(fs_meta_obj, root_path, seasons)
+    feature_store_name, update_seasons, load_seasons = plan['name'], plan['update_seasons'], plan['load_seasons']
+    if not update_seasons:
+        print(f"Skipping Feature Store: {feature_store_name} (no seasons from {fs_meta_obj['start_season']})")
+        return update_seasons
+
+    print(f"Running Feature Store: {feature_store_name} from {min(update_seasons)}-{max(update_seasons)} (loads: {min(load_seasons)}-{max(load_seasons)})")
+
+    from src.schemas.validation import format_violations, validate_feature_store
+
+    builder = load_builder(fs_meta_obj['obj'])
+    start = time.perf_counter()
+    fs_df = builder(load_seasons)
+    build_seconds = time.perf_counter() - start
+    memory_mb = round(fs_df.memory_usage(deep=True).sum() / (1024 ** 2), 2)
+    print(f"Adds: {memory_mb} MB to the Feature Store")
+
+    # Fail fast on a bad build before any season is rewritten
+    violations = validate_feature_store(feature_store_name, fs_df[fs_df.season.isin(update_seasons)], root_path, allow_drift=allow_schema_drift)
+    if violations:
+        raise ValueError(format_violations(feature_store_name, violations))
 
-def main():
+    start = time.perf_counter()
+    write_seasons(fs_df, root_path, feature_store_name, update_seasons)
+    put_run_report({
+        'name': feature_store_name,
+        'run_at': datetime.datetime.utcnow().isoformat(timespec='seconds'),
+        'mode': plan['mode'],
+        'update_seasons': update_seasons,
+        'n_load_seasons': len(load_seasons),
+        'build_seconds': round(build_seconds, 2),
+        'write_seconds': round(time.perf_counter() - start, 2),
+        'memory_mb': memory_mb,
+    })
+    return update_seasons
+
+
+def _run_feature_store_safe(fs_meta_obj, root_path=ROOT_PATH, allow_schema_drift=False, seasons=None):
+    """
+    Wrapper used by the parallel runner so a failing store reports back instead of killing the pool.
+    """
+    try:
+        written = run_feature_store(fs_meta_obj, root_path, allow_schema_drift, seasons)
+        return {'name': fs_meta_obj['name'], 'status': 'ok', 'seasons': written, 'error': None}
+    except Exception:
+        return {'name': fs_meta_obj['name'], 'status': 'failed', 'seasons': [], 'error': traceback.format_exc()}
+
+
+def _collect_result(future, fs_meta_obj):
+    """
+    Result of a store built in a worker process. A worker that dies (e.g. OOM killed) breaks the pool,
+    so the store is recorded as failed instead of losing the summary.
+    """
+    try:
+        return future.result()
+    except Exception:
+        return {'name': fs_meta_obj['name'], 'status': 'failed', 'seasons': [], 'error': traceback.format_exc()}
+
+
+def print_summary(results):
+    print("Feature Store Summary:")
+    for result in results:
+        seasons = f"{min(result['seasons'])}-{max(result['seasons'])}" if result['seasons'] else '-'
+        print(f"    {result['name']}: {result['status']} (seasons: {seasons})")
+        if result['error'] is not None:
+            print(result['error'])
+
+
+def benchmark_startup(repeats=5):
+    """
+    Wall time of importing the runner and of a --plan run in fresh interpreters (best of repeats).
+    """
+    commands = {
+        'import': [sys.executable, '-c', 'import feature_store_runner'],
+        'plan': [sys.executable, os.path.abspath(__file__), '--plan'],
+    }
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    print("Startup Benchmark:")
+    timings = {}
+    for label, command in commands.items():
+        runs = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+            runs.append(time.perf_counter() - start)
+        timings[label] = min(runs)
+        print(f"    {label}: {timings[label]:.3f}s (best of {repeats})")
+    return timings
 
-    root_path = './data/feature_store'
-    for fs_meta_obj in FEATURE_STORE_METAS:
-        feature_store_name = fs_meta_obj['name']
-        start_season = fs_meta_obj['start_season']
-        ## Determine pump mode
-        update_seasons = get_seasons_to_update(root_path, feature_store_name)
-        if min(update_seasons) < start_season:
-            update_seasons = [i for i in update_seasons if i >= start_season]
 
-        #update_seasons = [2004, 2005, 2006,2007,2008,2009,2010,2011,2012,2013,2014]
+def main(parallel=False, root_path=ROOT_PATH, allow_schema_drift=False, seasons=None, stores=None, plan=False):
+    unknown = sorted(set(stores or []) - {fs_meta_obj['name'] for fs_meta_obj in FEATURE_STORE_METAS})
+    if unknown:
+        raise ValueError(f"Unknown feature stores: {unknown}")
+    fs_metas = [fs_meta_obj for fs_meta_obj in FEATURE_STORE_METAS if not stores or fs_meta_obj['name'] in stores]
+    if not fs_metas:
+        print("No feature stores to run")
+        return 0
 
-        mode = 'refresh' if start_season in update_seasons else 'upsert'
+    if plan:
+        print_plan([plan_feature_store(fs_meta_obj, root_path, seasons) for fs_meta_obj in fs_metas], root_path)
+        return 0
 
-        # Use the last season for aggregate stats for upsert mode
-        load_seasons = update_seasons if mode == 'refresh' else list(range(min(update_seasons) - 1, max(update_seasons)+1))
+    if parallel:
+        # Stores are independent so each one is built in its own process
+        with ProcessPoolExecutor(max_workers=len(fs_metas)) as executor:
+            futures = [executor.submit(_run_feature_store_safe, fs_meta_obj, root_path, allow_schema_drift, seasons) for fs_meta_obj in fs_metas]
+            results = [_collect_result(future, fs_meta_obj) for future, fs_meta_obj in zip(futures, fs_metas)]
+    else:
+        results = [_run_feature_store_safe(fs_meta_obj, root_path, allow_schema_drift, seasons) for fs_meta_obj in fs_metas]
 
-        print(f"Running Feature Store: {feature_store_name} from {min(update_seasons)}-{max(update_seasons)} (loads: {min(load_seasons)}-{max(load_seasons)})")
+    print_summary(results)
+    return 1 if any(result['status'] != 'ok' for result in results) else 0
 
-        fs_df = fs_meta_obj['obj'](load_seasons)
-        print(f"Adds: {round(fs_df.memory_usage(deep=True).sum() / (1024 ** 2), 2)} MB to the Feature Store")
-        for season in update_seasons:
-            put_dataframe(fs_df[fs_df.season==season].copy(), f"{root_path}/{feature_store_name}/{season}.parquet")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Build the NFL feature stores')
+    parser.add_argument('--parallel', action='store_true', help='Build each feature store in its own process')
+    parser.add_argument('--allow-schema-drift', action='store_true', help='Allow the built columns to differ from the stored seasons')
+    parser.add_argument('--plan', action='store_true', help='Print the seasons, mode and estimates for each store without building')
+    parser.add_argument('--seasons', nargs='+', type=season_range, help='Override the seasons to update, e.g. 2004-2014 or 2023 2024')
+    parser.add_argument('--stores', nargs='+', choices=[fs_meta_obj['name'] for fs_meta_obj in FEATURE_STORE_METAS], help='Only run these feature stores')
+    parser.add_argument('--benchmark-startup', action='store_true', help='Time the runner import and a --plan run in fresh interpreters')
+    args = parser.parse_args()
+    if args.benchmark_startup:
+        benchmark_startup()
+        sys.exit(0)
+    sys.exit(main(
+        parallel=args.parallel,
+        allow_schema_drift=args.allow_schema_drift,
+        seasons=parse_seasons(args.seasons),
+        stores=args.stores,
+        plan=args.plan,
+    ))
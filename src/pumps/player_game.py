@@ -1,14 +1,18 @@
+import argparse
 import datetime
+import json
+import os
 
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 
 ###########################################################
 ## Loaders
 ###########################################################
-from src.extracts.pbp import get_play_by_play, load_mult_lats
-from src.extracts.player_stats import collect_players
-from src.utils import get_seasons_to_update
+from src.extracts.pbp import get_play_by_play
+from src.pumps.reference_data import get_esb_id_map, get_mult_lats, get_player_lookup, select_mult_lats
+from src.utils import get_seasons_to_update, parse_seasons, season_range
 
 ## From: https://github.com/nflverse/nflfastR/blob/master/R/aggregate_game_stats.R
 ## Converted from R to Python and additional stats needed for modeling from play by play data
@@ -20,6 +24,49 @@ from src.utils import get_seasons_to_update
 
 EXPERIMENT_SCORES = {}
 
+PLAYER_GAME_ID_COLUMNS = ['player_id', 'player_name', 'recent_team', 'season', 'week', 'season_type', 'opponent_team']
+
+PLAYER_GAME_STAT_COLUMNS = [
+    # Passing stats
+    'completions', 'attempts', 'passing_yards', 'passing_tds', 'interceptions',
+    'sacks', 'sack_yards', 'sack_fumbles', 'sack_fumbles_lost', 'passing_air_yards', 'passing_yards_after_catch',
+    'passing_first_downs', 'passing_epa', 'passing_2pt_conversions', 'pacr', 'dakota',
+
+    # Rushing stats
+    'carries', 'rushing_yards', 'rushing_tds', 'rushing_fumbles', 'rushing_fumbles_lost',
+    'rushing_first_downs', 'rushing_epa', 'rushing_2pt_conversions',
+
+    # Receiving stats
+    'receptions', 'targets', 'receiving_yards', 'receiving_tds', 'receiving_fumbles',
+    'receiving_fumbles_lost', 'receiving_air_yards', 'receiving_yards_after_catch',
+    'receiving_first_downs', 'receiving_epa', 'receiving_2pt_conversions', 'racr',
+    'target_share', 'air_yards_share', 'wopr',
+
+    # Special teams
+    'special_teams_tds'
+]
+
+# Stats that stay NaN (instead of 0) when a player has no plays in the stat family
+PLAYER_GAME_NAN_COLUMNS = ['passing_epa', 'rushing_epa', 'receiving_epa', 'dakota', 'racr', 'target_share', 'air_yards_share', 'wopr', 'pacr']
+
+# Standard scoring, fantasy_points_ppr adds 1 per reception
+FANTASY_POINT_WEIGHTS = {
+    'passing_yards': 1 / 25,
+    'passing_tds': 4,
+    'interceptions': -2,
+    'rushing_yards': 1 / 10,
+    'receiving_yards': 1 / 10,
+    'rushing_tds': 6,
+    'receiving_tds': 6,
+    'special_teams_tds': 6,
+    'passing_2pt_conversions': 2,
+    'rushing_2pt_conversions': 2,
+    'receiving_2pt_conversions': 2,
+    'sack_fumbles_lost': -2,
+    'rushing_fumbles_lost': -2,
+    'receiving_fumbles_lost': -2,
+}
+
 def decode_gsis(new_id):
     if pd.isna(new_id) or len(new_id) != 36:
         return new_id
@@ -30,28 +77,97 @@ def decode_gsis(new_id):
         decoded = ''.join([chr(int(byte, 16)) for byte in hex_bytes])
         return decoded
 
-def custom_mode(x, na_rm=True):
-    # Step 1: Remove NaN values if na_rm is True
-    if na_rm:
-        x = [i for i in x if pd.notna(i)]
+def groupwise_mode(data, by, columns):
+    """
+    Most frequent value of each column for every group at once.
+    Counts each (group keys, value) pair, then keeps the most frequent value per group.
+    NaN values are dropped and ties go to the smallest value.
+    - columns: dict of output column name -> source column
+    Returns a frame indexed by the group keys with one column per output name.
+    """
+    groups = data.groupby(by).size().index
+    modes = []
+    for name, column in columns.items():
+        # groupby output is sorted by value within each group so a stable sort on count keeps the smallest value first on ties
+        counts = data.groupby(by + [column]).size().reset_index(name='_count')
+        counts = counts.sort_values(by + ['_count'], ascending=[True] * len(by) + [False], kind='stable')
+        mode = counts.drop_duplicates(subset=by).set_index(by)[column]
+        modes.append(mode.reindex(groups).rename(name))
+    return pd.concat(modes, axis=1)
+
+
+def join_stat_blocks(blocks, keys, how='outer', defaults=None):
+    """
+    Multi-way join of stat blocks on a shared composite key.
+    The key is factorized once over every block and each block is aligned to the sorted key index with a
+    positional take, instead of chaining pd.merge calls that each hash the keys and materialize a wider frame.
+    Rows come out in the same order as the chained pd.merge calls (duplicate keys expand to every combination).
+    - how: 'outer' keeps every key sorted, 'left' keeps the rows of the first block
+    - defaults: dict of column -> value, NaNs are filled column by column after the join
+    """
+    all_keys = pd.concat([block[keys] for block in blocks], ignore_index=True)
+    # dropna=False so NaN keys match each other like they do in pd.merge
+    codes = all_keys.groupby(keys, sort=True, dropna=False).ngroup().to_numpy()
+    n_keys = codes.max() + 1 if len(codes) else 0
+    offsets = np.cumsum([0] + [len(block) for block in blocks])
+
+    if how == 'outer':
+        result_codes = np.arange(n_keys)
+        indexers = []
+    elif how == 'left':
+        result_codes = codes[:len(blocks[0])]
+        indexers = [np.arange(len(blocks[0]))]
+    else:
+        raise ValueError(f"Unsupported join: {how} (Supported: 'outer', 'left')")
+
+    for i in range(len(indexers), len(blocks)):
+        block_codes = codes[offsets[i]:offsets[i + 1]]
+        order = np.argsort(block_codes, kind='stable')
+        counts = np.bincount(block_codes, minlength=n_keys)
+        starts = np.cumsum(counts) - counts
+
+        # Repeat every result row once per matching block row (once with no match)
+        reps = np.maximum(counts[result_codes], 1)
+        row_ids = np.repeat(np.arange(len(result_codes)), reps)
+        within = np.arange(len(row_ids)) - np.repeat(np.cumsum(reps) - reps, reps)
+        result_codes = result_codes[row_ids]
+        indexers = [indexer[row_ids] for indexer in indexers]
+
+        matched = counts[result_codes] > 0
+        positions = np.where(matched, starts[result_codes] + within, 0)
+        indexers.append(np.where(matched, order[positions], -1) if len(block_codes) else np.full(len(result_codes), -1))
+
+    if how == 'outer':
+        _, first_rows = np.unique(codes, return_index=True)
+        columns = {key: all_keys[key].to_numpy()[first_rows[result_codes]] for key in keys}
+    else:
+        columns = {key: blocks[0][key].to_numpy()[indexers[0]] for key in keys}
+
+    for block, indexer in zip(blocks, indexers):
+        for col in block.columns:
+            if col in keys:
+                continue
+            if col in columns:
+                raise ValueError(f"Column {col} is in more than one block")
+            columns[col] = pd.api.extensions.take(block[col].values, indexer, allow_fill=True)
 
-    # Step 2: Find unique values
-    unique_values = np.unique(x)
+    df = pd.DataFrame(columns)
+    for col, value in (defaults or {}).items():
+        df[col] = df[col].fillna(value)
+    return df
 
-    # Step 3: Find the most frequent value
-    if len(unique_values) > 0:
-        mode_value = unique_values[np.argmax([x.count(val) for val in unique_values])]
-        return mode_value
-    else:
-        return None  # Return None if there are no valid values
 
+def fill_na_columns(df, value=0, exclude=()):
+    # Column by column fill so no full boolean NaN mask of the frame is built
+    for col in df.columns:
+        if col not in exclude and df[col].hasnans:
+            df[col] = df[col].fillna(value)
+    return df
 
-def decode_player_ids(data):
-    # Load player information from a CSV or some data source
-    players = pd.read_csv("https://github.com/nflverse/nflverse-data/releases/download/players/player_info.csv")
 
-    # Create a dictionary of GSIS IDs to ESB IDs
-    id_vector = dict(zip(players['esb_id'], players['gsis_id']))
+def decode_player_ids(data):
+    # Create a dictionary of GSIS IDs to ESB IDs (from the player_info reference snapshot)
+    id_vector = get_esb_id_map()
 
     # Apply decoding to all relevant columns
     player_id_columns = [col for col in data.columns if col.endswith('player_id') or col in ['passer_id', 'rusher_id', 'receiver_id', 'id', 'fantasy_id']]
@@ -129,36 +245,199 @@ def filter_two_point_conversions(pbp):
     ]].copy()
 
 
-def filter_passing_stats(data):
-    pass_df = data[((data['play_type'].isin(['pass', 'qb_spike'])))].groupby(['passer_player_id', 'week', 'season']).agg(
-        passing_yards_after_catch=pd.NamedAgg(column='passing_yards', aggfunc=lambda x: np.sum((x - data.loc[x.index, 'air_yards']) * data.loc[x.index, 'complete_pass'])),
-        name_pass=pd.NamedAgg(column='passer_player_name', aggfunc='first'),
-        team_pass=pd.NamedAgg(column='posteam', aggfunc='first'),
-        opp_pass=pd.NamedAgg(column='defteam', aggfunc='first'),
-        passing_yards=pd.NamedAgg(column='passing_yards', aggfunc='sum'),
-        passing_tds=pd.NamedAgg(column='touchdown', aggfunc=lambda x: np.sum((x == 1) & (data.loc[x.index, 'td_team'] == data.loc[x.index, 'posteam']) & (data.loc[x.index, 'complete_pass'] == 1))),
-        interceptions=pd.NamedAgg(column='interception', aggfunc='sum'),
-        attempts=pd.NamedAgg(column='complete_pass', aggfunc=lambda x: np.sum((x == 1) | (data.loc[x.index, 'incomplete_pass'] == 1) | (data.loc[x.index, 'interception'] == 1))),
-        completions=pd.NamedAgg(column='complete_pass', aggfunc=lambda x: np.sum(x == 1)),
-        sack_fumbles=pd.NamedAgg(column='fumble', aggfunc=lambda x: np.sum((x == 1) & (data.loc[x.index, 'fumbled_1_player_id'] == data.loc[x.index, 'passer_player_id']))),
-        sack_fumbles_lost=pd.NamedAgg(column='fumble_lost', aggfunc=lambda x: np.sum((x == 1) & (data.loc[x.index, 'fumbled_1_player_id'] == data.loc[x.index, 'passer_player_id']) & (data.loc[x.index, 'fumble_recovery_1_team'] != data.loc[x.index, 'posteam']))),
-        passing_air_yards=pd.NamedAgg(column='air_yards', aggfunc='sum'),
-        sacks=pd.NamedAgg(column='sack', aggfunc='sum'),
-        sack_yards=pd.NamedAgg(column='yards_gained', aggfunc=lambda x: -np.sum(x * data.loc[x.index, 'sack'])),
-        passing_first_downs=pd.NamedAgg(column='first_down_pass', aggfunc='sum'),
-        passing_epa=pd.NamedAgg(column='qb_epa', aggfunc='sum')
-    ).reset_index()
+###########################################################
+## Play Facts
+###########################################################
+## Every stat family (pass, rush, rush laterals, receiving, receiving laterals, team receiving) is a sum over
+## the normal plays keyed by a different id column. The derived flags are computed once on the play frame,
+## stacked into a long (role, player_id, week, season, stat) table, aggregated with one groupby and pivoted once.
+
+PLAY_FACT_ROLES = {
+    'pass': {
+        'id': 'passer_player_id',
+        'filter': 'is_pass_play',
+        'labels': {'name_pass': 'passer_player_name', 'team_pass': 'posteam', 'opp_pass': 'defteam'},
+        'stats': {
+            'passing_yards_after_catch': 'pass_yards_after_catch',
+            'passing_yards': 'passing_yards',
+            'passing_tds': 'pass_td',
+            'interceptions': 'interception',
+            'attempts': 'pass_attempt_fact',
+            'completions': 'completion',
+            'sack_fumbles': 'sack_fumble',
+            'sack_fumbles_lost': 'sack_fumble_lost',
+            'passing_air_yards': 'air_yards',
+            'sacks': 'sack',
+            'sack_yards': 'sack_yards_lost',
+            'passing_first_downs': 'first_down_pass',
+            'passing_epa': 'qb_epa',
+        },
+    },
+    'rush': {
+        'id': 'rusher_player_id',
+        'filter': 'is_rush_play',
+        'labels': {'name_rush': 'rusher_player_name', 'team_rush': 'posteam', 'opp_rush': 'defteam'},
+        'stats': {
+            'yards': 'rushing_yards',
+            'tds': 'rush_td',
+            'carries': 'play_count',
+            'rushing_fumbles': 'rush_fumble',
+            'rushing_fumbles_lost': 'rush_fumble_lost',
+            'rushing_first_downs': 'rush_first_down',
+            'rushing_epa': 'epa',
+        },
+    },
+    'rush_lateral': {
+        'id': 'lateral_rusher_player_id',
+        'filter': 'is_normal_play',
+        'labels': {},
+        'stats': {
+            'lateral_yards': 'lateral_rushing_yards',
+            'lateral_fds': 'first_down_rush',
+            'lateral_tds': 'lateral_rush_td',
+            'lateral_att': 'play_count',
+            'lateral_fumbles': 'fumble',
+            'lateral_fumbles_lost': 'fumble_lost',
+        },
+    },
+    'receiver': {
+        'id': 'receiver_player_id',
+        'filter': 'is_normal_play',
+        'labels': {'name_receiver': 'receiver_player_name', 'team_receiver': 'posteam', 'opp_receiver': 'defteam'},
+        'stats': {
+            'yards': 'receiving_yards',
+            'receptions': 'completion',
+            'targets': 'play_count',
+            'tds': 'rec_td',
+            'receiving_fumbles': 'rec_fumble',
+            'receiving_fumbles_lost': 'rec_fumble_lost',
+            'receiving_air_yards': 'air_yards',
+            'receiving_yards_after_catch': 'yards_after_catch',
+            'receiving_first_downs': 'rec_first_down',
+            'receiving_epa': 'epa',
+        },
+    },
+    'receiver_lateral': {
+        'id': 'lateral_receiver_player_id',
+        'filter': 'is_normal_play',
+        'labels': {},
+        'stats': {
+            'lateral_yards': 'lateral_receiving_yards',
+            'lateral_tds': 'lateral_rec_td',
+            'lateral_att': 'play_count',
+            'lateral_fds': 'first_down_pass',
+            'lateral_fumbles': 'fumble',
+            'lateral_fumbles_lost': 'fumble_lost',
+        },
+    },
+    # Keyed by posteam rather than a player for target / air yard shares
+    'team_receiving': {
+        'id': 'posteam',
+        'filter': 'has_receiver',
+        'labels': {},
+        'stats': {
+            'team_targets': 'play_count',
+            'team_air_yards': 'air_yards',
+        },
+    },
+}
+
+
+# pbp columns the play fact flags are derived from (the role ids, labels and stats are added from PLAY_FACT_ROLES)
+PLAY_FACT_INPUT_COLUMNS = [
+    'week', 'season', 'down', 'play_type', 'posteam', 'passer_player_id', 'rusher_player_id', 'receiver_player_id',
+    'lateral_rusher_player_id', 'lateral_receiver_player_id', 'td_player_id', 'td_team', 'fumbled_1_player_id',
+    'fumble', 'fumble_lost', 'fumble_recovery_1_team', 'passing_yards', 'air_yards', 'yards_gained', 'sack',
+    'touchdown', 'complete_pass', 'incomplete_pass', 'interception', 'first_down_rush', 'first_down_pass',
+]
+
+
+def make_play_facts(pbp, roles=PLAY_FACT_ROLES):
+    """
+    Filter the normal plays and add every derived flag the stat families need in one pass over the frame.
+    Only the columns the flags and roles read are kept, so the ~370 column pbp frame is never copied.
+    """
+    role_columns = {col for spec in roles.values() for col in [spec['id'], *spec['labels'].values(), *spec['stats'].values()]}
+    needed = set(PLAY_FACT_INPUT_COLUMNS) | role_columns
+    data = filter_normal_plays(pbp[[col for col in pbp.columns if col in needed]])
+
+    # Play type flags
+    data['is_normal_play'] = True
+    data['is_pass_play'] = data['play_type'].isin(['pass', 'qb_spike'])
+    data['is_rush_play'] = data['play_type'].isin(['run', 'qb_kneel'])
+    data['has_receiver'] = data['receiver_player_id'].notna()
+    data['play_count'] = 1
+
+    no_rush_lateral = data['lateral_rusher_player_id'].isna()
+    no_rec_lateral = data['lateral_receiver_player_id'].isna()
+    fumble_lost_to_defense = (data['fumble_lost'] == 1) & (data['fumble_recovery_1_team'] != data['posteam'])
+
+    # Passing
+    data['pass_yards_after_catch'] = (data['passing_yards'] - data['air_yards']) * data['complete_pass']
+    data['pass_td'] = (data['touchdown'] == 1) & (data['td_team'] == data['posteam']) & (data['complete_pass'] == 1)
+    data['pass_attempt_fact'] = (data['complete_pass'] == 1) | (data['incomplete_pass'] == 1) | (data['interception'] == 1)
+    data['completion'] = data['complete_pass'] == 1
+    passer_fumbled = data['fumbled_1_player_id'] == data['passer_player_id']
+    data['sack_fumble'] = (data['fumble'] == 1) & passer_fumbled
+    data['sack_fumble_lost'] = fumble_lost_to_defense & passer_fumbled
+    data['sack_yards_lost'] = -(data['yards_gained'] * data['sack'])
+
+    # Rushing
+    data['rush_td'] = data['td_player_id'] == data['rusher_player_id']
+    rusher_fumbled = (data['fumbled_1_player_id'] == data['rusher_player_id']) & no_rush_lateral
+    data['rush_fumble'] = (data['fumble'] == 1) & rusher_fumbled
+    data['rush_fumble_lost'] = fumble_lost_to_defense & rusher_fumbled
+    data['rush_first_down'] = (data['first_down_rush'] == 1) & no_rush_lateral
+    data['lateral_rush_td'] = data['td_player_id'] == data['lateral_rusher_player_id']
+
+    # Receiving
+    data['rec_td'] = data['td_player_id'] == data['receiver_player_id']
+    receiver_fumbled = (data['fumbled_1_player_id'] == data['receiver_player_id']) & no_rec_lateral
+    data['rec_fumble'] = (data['fumble'] == 1) & receiver_fumbled
+    data['rec_fumble_lost'] = fumble_lost_to_defense & receiver_fumbled
+    data['rec_first_down'] = (data['first_down_pass'] == 1) & no_rec_lateral
+    data['lateral_rec_td'] = data['td_player_id'] == data['lateral_receiver_player_id']
+    return data
 
-    # Calculate PACR, handling cases where passing_air_yards might be 0 or NaN
-    pass_df['pacr'] = pass_df.apply(
-        lambda row: None if pd.isna(row['passing_air_yards']) or row['passing_air_yards'] <= 0
-        else row['passing_yards'] / row['passing_air_yards'],
-        axis=1
-    )
 
-    # Rename columns
-    pass_df = pass_df.rename(columns={'passer_player_id': 'player_id'})
-    return pass_df
+def aggregate_play_facts(facts, roles=PLAY_FACT_ROLES):
+    """
+    Aggregate every role in one groupby over a long (role, player_id, week, season, stat) table and pivot once.
+    Returns a dict of role -> frame with player_id, week, season, the role labels (first non-null) and the role stats.
+    """
+    keys = ['role', 'player_id', 'week', 'season']
+    stat_blocks = []
+    label_blocks = []
+    for role, spec in roles.items():
+        role_columns = list(dict.fromkeys(['week', 'season', spec['id'], *spec['labels'].values(), *spec['stats'].values()]))
+        rows = facts.loc[facts[spec['filter']] & facts[spec['id']].notna(), role_columns]
+        index = {'role': role, 'player_id': rows[spec['id']], 'week': rows['week'], 'season': rows['season']}
+
+        stats = pd.DataFrame({**index, **{stat: rows[col].astype(float) for stat, col in spec['stats'].items()}})
+        stat_blocks.append(stats.melt(id_vars=keys, var_name='stat', value_name='value'))
+        if spec['labels']:
+            # Labels share generic names across roles so they stack into the same columns
+            name_col, team_col, opp_col = spec['labels'].values()
+            label_blocks.append(pd.DataFrame({**index, 'name': rows[name_col], 'team': rows[team_col], 'opp': rows[opp_col]}))
+
+    wide = pd.concat(stat_blocks, ignore_index=True).groupby(keys + ['stat'])['value'].sum().unstack('stat')
+    labels = pd.concat(label_blocks, ignore_index=True).groupby(keys)[['name', 'team', 'opp']].first()
+
+    role_dfs = {}
+    for role, spec in roles.items():
+        role_df = _select_role(wide, role, list(spec['stats'].keys()))
+        if spec['labels']:
+            role_labels = _select_role(labels, role, ['name', 'team', 'opp'])
+            role_labels.columns = list(spec['labels'].keys())
+            role_df = role_labels.join(role_df)
+        role_dfs[role] = role_df.reset_index()
+    return role_dfs
+
+
+def _select_role(df, role, columns):
+    if role in df.index.get_level_values('role'):
+        return df.loc[role, columns]
+    return pd.DataFrame(columns=columns, index=pd.MultiIndex.from_tuples([], names=['player_id', 'week', 'season']))
 
 
 def filter_pass_two_point_conversions(two_points):
@@ -166,12 +445,11 @@ def filter_pass_two_point_conversions(two_points):
     pass_two_points = two_points[two_points['pass_attempt'] == 1]
 
     # Step 2: Group by 'passer_player_id', 'week', and 'season'
-    pass_two_points = pass_two_points.groupby(['passer_player_id', 'week', 'season']).agg(
-        name_pass=('passer_player_name', custom_mode),  # Apply custom mode function
-        team_pass=('posteam', custom_mode),
-        opp_pass=('defteam', custom_mode),
-        passing_2pt_conversions=('pass_attempt', 'count')  # Count the number of pass attempts
-    ).reset_index()
+    keys = ['passer_player_id', 'week', 'season']
+    pass_two_points = pd.concat([
+        groupwise_mode(pass_two_points, keys, {'name_pass': 'passer_player_name', 'team_pass': 'posteam', 'opp_pass': 'defteam'}),
+        pass_two_points.groupby(keys).agg(passing_2pt_conversions=('pass_attempt', 'count'))  # Count the number of pass attempts
+    ], axis=1).reset_index()
 
     # Step 3: Rename 'passer_player_id' to 'player_id'
     pass_two_points = pass_two_points.rename(columns={'passer_player_id': 'player_id'})
@@ -180,15 +458,22 @@ def filter_pass_two_point_conversions(two_points):
 
 
 def process_pass_df(pass_df, pass_two_points):
-    # Step 1: Perform a full join (outer merge)
-    pass_df = pd.merge(
-        pass_df, pass_two_points,
-        on=["player_id", "week", "season", "name_pass", "team_pass", "opp_pass"],
-        how="outer"
+    # Calculate PACR, handling cases where passing_air_yards might be 0 or NaN
+    pass_df['pacr'] = pass_df.apply(
+        lambda row: None if pd.isna(row['passing_air_yards']) or row['passing_air_yards'] <= 0
+        else row['passing_yards'] / row['passing_air_yards'],
+        axis=1
     )
 
+    # Step 1: Perform a full join (outer merge)
     # Step 2: Replace NaN values in 'passing_2pt_conversions' with 0
-    pass_df['passing_2pt_conversions'] = pass_df['passing_2pt_conversions'].fillna(0).astype(int)
+    pass_df = join_stat_blocks(
+        [pass_df, pass_two_points],
+        ["player_id", "week", "season", "name_pass", "team_pass", "opp_pass"],
+        how="outer",
+        defaults={'passing_2pt_conversions': 0}
+    )
+    pass_df['passing_2pt_conversions'] = pass_df['passing_2pt_conversions'].astype(int)
 
     # Step 3: Filter out rows where 'player_id' is NaN
     pass_df = pass_df[~pass_df['player_id'].isna()]
@@ -202,48 +487,12 @@ def process_pass_df(pass_df, pass_two_points):
     return pass_df
 
 
-def filter_rush_stats(data):
-    rush_df = (
-        data[((data['play_type'].isin(['run', 'qb_kneel'])))]
-            .groupby(['rusher_player_id', 'week', 'season'])
-            .agg(
-            name_rush=pd.NamedAgg(column='rusher_player_name', aggfunc='first'),
-            team_rush=pd.NamedAgg(column='posteam', aggfunc='first'),
-            opp_rush=pd.NamedAgg(column='defteam', aggfunc='first'),
-            yards=pd.NamedAgg(column='rushing_yards', aggfunc='sum'),
-            tds=pd.NamedAgg(column='td_player_id', aggfunc=lambda x: np.sum(x == data.loc[x.index, 'rusher_player_id'])),
-            carries=pd.NamedAgg(column='rusher_player_id', aggfunc='count'),
-            rushing_fumbles=pd.NamedAgg(column='fumble', aggfunc=lambda x: np.sum((x == 1) & (data.loc[x.index, 'fumbled_1_player_id'] == data.loc[x.index, 'rusher_player_id']) & pd.isna(data.loc[x.index, 'lateral_rusher_player_id']))),
-            rushing_fumbles_lost=pd.NamedAgg(column='fumble_lost', aggfunc=lambda x: np.sum(
-                (x == 1) & (data.loc[x.index, 'fumbled_1_player_id'] == data.loc[x.index, 'rusher_player_id']) & pd.isna(data.loc[x.index, 'lateral_rusher_player_id']) & (data.loc[x.index, 'fumble_recovery_1_team'] != data.loc[x.index, 'posteam']))),
-            rushing_first_downs=pd.NamedAgg(column='first_down_rush', aggfunc=lambda x: np.sum((x == 1) & pd.isna(data.loc[x.index, 'lateral_rusher_player_id']))),
-            rushing_epa=pd.NamedAgg(column='epa', aggfunc='sum')
-        ).reset_index()
-    )
-
-    return rush_df
-
-
-def filter_rush_lateral_stats(data, mult_lats):
-    # Filter and group the lateral rushes data
-    laterals = data[~data['lateral_rusher_player_id'].isna()].groupby(['lateral_rusher_player_id', 'week', 'season']).agg(
-        lateral_yards=pd.NamedAgg(column='lateral_rushing_yards', aggfunc='sum'),
-        lateral_fds=pd.NamedAgg(column='first_down_rush', aggfunc='sum'),
-        lateral_tds=pd.NamedAgg(column='td_player_id', aggfunc=lambda x: np.sum(x == data.loc[x.index, 'lateral_rusher_player_id'])),
-        lateral_att=pd.NamedAgg(column='lateral_rusher_player_id', aggfunc='count'),
-        lateral_fumbles=pd.NamedAgg(column='fumble', aggfunc='sum'),
-        lateral_fumbles_lost=pd.NamedAgg(column='fumble_lost', aggfunc='sum')
-    ).reset_index()
-
+def filter_rush_lateral_stats(laterals, data, mult_lats):
     # Rename column to match rusher_player_id
-    laterals = laterals.rename(columns={'lateral_rusher_player_id': 'rusher_player_id'})
+    laterals = laterals.rename(columns={'player_id': 'rusher_player_id'})
 
     # Bind rows from `mult_lats`
-    additional_laterals = mult_lats[
-                              (mult_lats['type'] == 'lateral_rushing') &
-                              (mult_lats['season'].isin(data['season'])) &
-                              (mult_lats['week'].isin(data['week']))
-                              ].loc[:, ['season', 'week', 'gsis_player_id', 'yards']].rename(
+    additional_laterals = select_mult_lats(mult_lats, 'lateral_rushing', data['season'], data['week']).loc[:, ['season', 'week', 'gsis_player_id', 'yards']].rename(
         columns={'gsis_player_id': 'rusher_player_id', 'yards': 'lateral_yards'}
     )
 
@@ -264,12 +513,11 @@ def filter_rush_two_point_conversions(two_points):
     rush_two_points = two_points[two_points['rush_attempt'] == 1]
 
     # Step 2: Group by 'rusher_player_id', 'week', and 'season'
-    rush_two_points = rush_two_points.groupby(['rusher_player_id', 'week', 'season']).agg(
-        name_rush=('rusher_player_name', custom_mode),  # Apply custom mode function
-        team_rush=('posteam', custom_mode),
-        opp_rush=('defteam', custom_mode),
-        rushing_2pt_conversions=('rush_attempt', 'count')  # Count the number of rush attempts
-    ).reset_index()
+    keys = ['rusher_player_id', 'week', 'season']
+    rush_two_points = pd.concat([
+        groupwise_mode(rush_two_points, keys, {'name_rush': 'rusher_player_name', 'team_rush': 'posteam', 'opp_rush': 'defteam'}),
+        rush_two_points.groupby(keys).agg(rushing_2pt_conversions=('rush_attempt', 'count'))  # Count the number of rush attempts
+    ], axis=1).reset_index()
 
     # Step 3: Rename 'rusher_player_id' to 'player_id'
     rush_two_points = rush_two_points.rename(columns={'rusher_player_id': 'player_id'})
@@ -278,14 +526,12 @@ def filter_rush_two_point_conversions(two_points):
 
 
 def process_rush_df(rushes, laterals, rush_two_points):
-    rush_df = pd.merge(rushes, laterals, on=['rusher_player_id', 'week', 'season'], how='left')
-
     # Replace NaN values with defaults for lateral columns
-    rush_df['lateral_yards'] = rush_df['lateral_yards'].fillna(0)
-    rush_df['lateral_tds'] = rush_df['lateral_tds'].fillna(0).astype(int)
-    rush_df['lateral_fumbles'] = rush_df['lateral_fumbles'].fillna(0)
-    rush_df['lateral_fumbles_lost'] = rush_df['lateral_fumbles_lost'].fillna(0)
-    rush_df['lateral_fds'] = rush_df['lateral_fds'].fillna(0)
+    rush_df = join_stat_blocks(
+        [rushes, laterals], ['rusher_player_id', 'week', 'season'], how='left',
+        defaults={'lateral_yards': 0, 'lateral_tds': 0, 'lateral_fumbles': 0, 'lateral_fumbles_lost': 0, 'lateral_fds': 0}
+    )
+    rush_df['lateral_tds'] = rush_df['lateral_tds'].astype(int)
 
     # Add the new columns by combining rushing and lateral stats
     rush_df['rushing_yards'] = rush_df['yards'] + rush_df['lateral_yards']
@@ -301,69 +547,24 @@ def process_rush_df(rushes, laterals, rush_two_points):
                   'rushing_fumbles_lost', 'rushing_first_downs', 'rushing_epa']
               ]
     # Full join (outer merge) with `rush_two_points`
-    rush_df = pd.merge(rush_df, rush_two_points, how='outer', on=['player_id', 'week', 'season', 'name_rush', 'team_rush', 'opp_rush'])
-
     # Replace NaN values in `rushing_2pt_conversions` with 0
-    rush_df['rushing_2pt_conversions'] = rush_df['rushing_2pt_conversions'].fillna(0).astype(int)
+    rush_df = join_stat_blocks(
+        [rush_df, rush_two_points], ['player_id', 'week', 'season', 'name_rush', 'team_rush', 'opp_rush'], how='outer',
+        defaults={'rushing_2pt_conversions': 0}
+    )
+    rush_df['rushing_2pt_conversions'] = rush_df['rushing_2pt_conversions'].astype(int)
 
     # Filter rows where `player_id` is not NaN
-    rush_df = rush_df[~rush_df['player_id'].isna()]
+    rush_df = rush_df[~rush_df['player_id'].isna()].copy()
 
-    # Identify the columns that contain NaN values
-    rush_df_nas = rush_df.isna()
+    # Replace NaN values with 0 for all columns except "rushing_epa"
+    return fill_na_columns(rush_df, 0, exclude=['rushing_epa'])
 
-    # Find the index of the "rushing_epa" column
-    epa_index = rush_df.columns.get_loc('rushing_epa')
 
-    # Set the values in the "rushing_epa" column to `False` in the NaN tracker
-    rush_df_nas.iloc[:, epa_index] = False
+def filter_receiver_lateral_stats(laterals, data, mult_lats):
+    laterals = laterals.rename(columns={'player_id': 'receiver_player_id'})
 
-    # Replace NaN values with 0 for all columns except "rushing_epa"
-    rush_df[rush_df_nas] = 0
-    return rush_df
-
-
-def filter_receiver_stats(data):
-    rec_df = (
-        data[data['receiver_player_id'].notna()]
-            .groupby(['receiver_player_id', 'week', 'season'])
-            .agg(
-            name_receiver=pd.NamedAgg(column='receiver_player_name', aggfunc='first'),
-            team_receiver=pd.NamedAgg(column='posteam', aggfunc='first'),
-            opp_receiver=pd.NamedAgg(column='defteam', aggfunc='first'),
-            yards=pd.NamedAgg(column='receiving_yards', aggfunc='sum'),
-            receptions=pd.NamedAgg(column='complete_pass', aggfunc=lambda x: np.sum(x == 1)),
-            targets=pd.NamedAgg(column='receiver_player_id', aggfunc='count'),
-            tds=pd.NamedAgg(column='td_player_id', aggfunc=lambda x: np.sum(x == data.loc[x.index, 'receiver_player_id'])),
-            receiving_fumbles=pd.NamedAgg(column='fumble', aggfunc=lambda x: np.sum((x == 1) & (data.loc[x.index, 'fumbled_1_player_id'] == data.loc[x.index, 'receiver_player_id']) & data.loc[x.index, 'lateral_receiver_player_id'].isna())),
-            receiving_fumbles_lost=pd.NamedAgg(column='fumble_lost', aggfunc=lambda x: np.sum(
-                (x == 1) & (data.loc[x.index, 'fumbled_1_player_id'] == data.loc[x.index, 'receiver_player_id']) & data.loc[x.index, 'lateral_receiver_player_id'].isna() & (data.loc[x.index, 'fumble_recovery_1_team'] != data.loc[x.index, 'posteam']))),
-            receiving_air_yards=pd.NamedAgg(column='air_yards', aggfunc='sum'),
-            receiving_yards_after_catch=pd.NamedAgg(column='yards_after_catch', aggfunc='sum'),
-            receiving_first_downs=pd.NamedAgg(column='first_down_pass', aggfunc=lambda x: np.sum((x == 1) & data.loc[x.index, 'lateral_receiver_player_id'].isna())),
-            receiving_epa=pd.NamedAgg(column='epa', aggfunc='sum')
-        ).reset_index()
-    )
-    return rec_df
-
-
-def filter_receiver_lateral_stats(data, mult_lats):
-    laterals = data[data['lateral_receiver_player_id'].notna()].groupby(['lateral_receiver_player_id', 'week', 'season']).agg(
-        lateral_yards=pd.NamedAgg(column='lateral_receiving_yards', aggfunc='sum'),
-        lateral_tds=pd.NamedAgg(column='td_player_id', aggfunc=lambda x: np.sum(x == data.loc[x.index, 'lateral_receiver_player_id'])),
-        lateral_att=pd.NamedAgg(column='lateral_receiver_player_id', aggfunc='count'),
-        lateral_fds=pd.NamedAgg(column='first_down_pass', aggfunc='sum'),
-        lateral_fumbles=pd.NamedAgg(column='fumble', aggfunc='sum'),
-        lateral_fumbles_lost=pd.NamedAgg(column='fumble_lost', aggfunc='sum')
-    ).reset_index()
-
-    laterals = laterals.rename(columns={'lateral_receiver_player_id': 'receiver_player_id'})
-
-    additional_laterals = mult_lats[
-        (mult_lats['type'] == 'lateral_receiving') &
-        (mult_lats['season'].isin(data['season'])) &
-        (mult_lats['week'].isin(data['week']))
-        ][['season', 'week', 'gsis_player_id', 'yards']].rename(
+    additional_laterals = select_mult_lats(mult_lats, 'lateral_receiving', data['season'], data['week'])[['season', 'week', 'gsis_player_id', 'yards']].rename(
         columns={'gsis_player_id': 'receiver_player_id', 'yards': 'lateral_yards'}
     )
 
@@ -377,34 +578,24 @@ def filter_receiver_lateral_stats(data, mult_lats):
 
 
 def filter_receiver_two_point_conversions(two_points):
-    rec_two_points = two_points[two_points['pass_attempt'] == 1].groupby(['receiver_player_id', 'week', 'season']).agg(
-        name_receiver=('receiver_player_name', custom_mode),
-        team_receiver=('posteam', custom_mode),
-        opp_receiver=('defteam', custom_mode),
-        receiving_2pt_conversions=('pass_attempt', 'count')
-    ).reset_index()
+    rec_two_points = two_points[two_points['pass_attempt'] == 1]
+    keys = ['receiver_player_id', 'week', 'season']
+    rec_two_points = pd.concat([
+        groupwise_mode(rec_two_points, keys, {'name_receiver': 'receiver_player_name', 'team_receiver': 'posteam', 'opp_receiver': 'defteam'}),
+        rec_two_points.groupby(keys).agg(receiving_2pt_conversions=('pass_attempt', 'count'))
+    ], axis=1).reset_index()
 
     rec_two_points = rec_two_points.rename(columns={'receiver_player_id': 'player_id'})
     return rec_two_points
 
 
-def filter_team_receiving_stats(data):
-    rec_team = data[data['receiver_player_id'].notna()].groupby(['posteam', 'week', 'season']).agg(
-        team_targets=pd.NamedAgg(column='receiver_player_id', aggfunc='count'),
-        team_air_yards=pd.NamedAgg(column='air_yards', aggfunc='sum')
-    ).reset_index()
-    return rec_team
-
-
 def process_receiver_df(rec, laterals, rec_team, rec_two_points, racr_ids):
-    rec_df = pd.merge(rec, laterals, on=['receiver_player_id', 'week', 'season'], how='left')
-    rec_df = pd.merge(rec_df, rec_team, left_on=['team_receiver', 'week', 'season'], right_on=['posteam', 'week', 'season'], how='left')
-
-    rec_df['lateral_yards'] = rec_df['lateral_yards'].fillna(0)
-    rec_df['lateral_tds'] = rec_df['lateral_tds'].fillna(0).astype(int)
-    rec_df['lateral_fumbles'] = rec_df['lateral_fumbles'].fillna(0)
-    rec_df['lateral_fumbles_lost'] = rec_df['lateral_fumbles_lost'].fillna(0)
-    rec_df['lateral_fds'] = rec_df['lateral_fds'].fillna(0)
+    rec_df = join_stat_blocks(
+        [rec, laterals], ['receiver_player_id', 'week', 'season'], how='left',
+        defaults={'lateral_yards': 0, 'lateral_tds': 0, 'lateral_fumbles': 0, 'lateral_fumbles_lost': 0, 'lateral_fds': 0}
+    )
+    rec_df = join_stat_blocks([rec_df, rec_team.rename(columns={'posteam': 'team_receiver'})], ['team_receiver', 'week', 'season'], how='left')
+    rec_df['lateral_tds'] = rec_df['lateral_tds'].astype(int)
 
     rec_df['receiving_yards'] = rec_df['yards'] + rec_df['lateral_yards']
     rec_df['receiving_tds'] = rec_df['tds'] + rec_df['lateral_tds']
@@ -454,25 +645,21 @@ def process_receiver_df(rec, laterals, rec_team, rec_two_points, racr_ids):
         'racr', 'target_share', 'air_yards_share', 'wopr'
     ]]
 
-    rec_df = pd.merge(rec_df, rec_two_points, on=['player_id', 'week', 'season', 'name_receiver', 'team_receiver', 'opp_receiver'], how='outer')
-    rec_df['receiving_2pt_conversions'] = rec_df['receiving_2pt_conversions'].fillna(0).astype(int)
-
-    rec_df = rec_df[rec_df['player_id'].notna() & rec_df['name_receiver'].notna()]
+    rec_df = join_stat_blocks(
+        [rec_df, rec_two_points], ['player_id', 'week', 'season', 'name_receiver', 'team_receiver', 'opp_receiver'], how='outer',
+        defaults={'receiving_2pt_conversions': 0}
+    )
+    rec_df['receiving_2pt_conversions'] = rec_df['receiving_2pt_conversions'].astype(int)
 
-    rec_df_nas = rec_df.isna()
-    epa_index = rec_df.columns.get_loc('receiving_epa')
-    rec_df_nas.iloc[:, epa_index] = False
+    rec_df = rec_df[rec_df['player_id'].notna() & rec_df['name_receiver'].notna()].copy()
 
-    rec_df[rec_df_nas] = 0
-    return rec_df
+    return fill_na_columns(rec_df, 0, exclude=['receiving_epa'])
 
 
 def combine_all_stats(pass_df, rush_df, rec_df, st_tds, s_type):
     # Full joins for combining the dataframes
-    player_df = pd.merge(pass_df, rush_df, on=['player_id', 'week', 'season'], how='outer')
-    player_df = pd.merge(player_df, rec_df, on=['player_id', 'week', 'season'], how='outer')
-    player_df = pd.merge(player_df, st_tds, on=['player_id', 'week', 'season'], how='outer')
-    player_df = pd.merge(player_df, s_type, on=['season', 'week'], how='left')
+    player_df = join_stat_blocks([pass_df, rush_df, rec_df, st_tds], ['player_id', 'week', 'season'], how='outer')
+    player_df = join_stat_blocks([player_df, s_type], ['season', 'week'], how='left')
 
     # Mutate step to create player_name, recent_team, and opponent_team based on conditions
     player_df['player_name'] = np.where(
@@ -494,56 +681,18 @@ def combine_all_stats(pass_df, rush_df, rec_df, st_tds, s_type):
     )
 
     # Select the columns
-    columns_to_select = [
-        # ID information
-        'player_id', 'player_name', 'recent_team', 'season', 'week', 'season_type', 'opponent_team',
-
-        # Passing stats
-        'completions', 'attempts', 'passing_yards', 'passing_tds', 'interceptions',
-        'sacks', 'sack_yards', 'sack_fumbles', 'sack_fumbles_lost', 'passing_air_yards', 'passing_yards_after_catch',
-        'passing_first_downs', 'passing_epa', 'passing_2pt_conversions', 'pacr', 'dakota',
-
-        # Rushing stats
-        'carries', 'rushing_yards', 'rushing_tds', 'rushing_fumbles', 'rushing_fumbles_lost',
-        'rushing_first_downs', 'rushing_epa', 'rushing_2pt_conversions',
-
-        # Receiving stats
-        'receptions', 'targets', 'receiving_yards', 'receiving_tds', 'receiving_fumbles',
-        'receiving_fumbles_lost', 'receiving_air_yards', 'receiving_yards_after_catch',
-        'receiving_first_downs', 'receiving_epa', 'receiving_2pt_conversions', 'racr',
-        'target_share', 'air_yards_share', 'wopr',
-
-        # Special teams
-        'special_teams_tds'
-    ]
+    columns_to_select = PLAYER_GAME_ID_COLUMNS + PLAYER_GAME_STAT_COLUMNS
 
     player_df = player_df[columns_to_select]
 
     # Filter out rows where player_id or player_name is missing
-    player_df = player_df[player_df['player_id'].notna() & player_df['player_name'].notna()]
-
-    # Handle NA values in specific columns
-    player_df_nas = player_df.isna()
+    player_df = player_df[player_df['player_id'].notna() & player_df['player_name'].notna()].copy()
 
-    epa_columns = ['passing_epa', 'rushing_epa', 'receiving_epa', 'dakota', 'racr', 'target_share', 'air_yards_share', 'wopr', 'pacr']
-    epa_indices = [player_df.columns.get_loc(col) for col in epa_columns if col in player_df.columns]
-
-    # Set False for those epa columns
-    player_df_nas.iloc[:, epa_indices] = False
-
-    # Replace remaining NA values with 0
-    player_df[player_df_nas] = 0
+    # Replace NA values with 0 except for the epa / ratio columns
+    player_df = fill_na_columns(player_df, 0, exclude=PLAYER_GAME_NAN_COLUMNS)
 
     # Calculate fantasy points and fantasy points with PPR
-    player_df['fantasy_points'] = (
-            (1 / 25 * player_df['passing_yards']) +
-            (4 * player_df['passing_tds']) +
-            (-2 * player_df['interceptions']) +
-            (1 / 10 * (player_df['rushing_yards'] + player_df['receiving_yards'])) +
-            (6 * (player_df['rushing_tds'] + player_df['receiving_tds'] + player_df['special_teams_tds'])) +
-            (2 * (player_df['passing_2pt_conversions'] + player_df['rushing_2pt_conversions'] + player_df['receiving_2pt_conversions'])) +
-            (-2 * (player_df['sack_fumbles_lost'] + player_df['rushing_fumbles_lost'] + player_df['receiving_fumbles_lost']))
-    )
+    player_df['fantasy_points'] = sum(weight * player_df[col] for col, weight in FANTASY_POINT_WEIGHTS.items())
 
     player_df['fantasy_points_ppr'] = player_df['fantasy_points'] + player_df['receptions']
 
@@ -552,9 +701,14 @@ def combine_all_stats(pass_df, rush_df, rec_df, st_tds, s_type):
 
     return player_df
 
-def calculate_player_stats(pbp, weekly=False):
-    mult_lats = load_mult_lats()
-    data = filter_normal_plays(pbp)
+def calculate_player_stat_blocks(pbp):
+    """
+    Per stat family player-week frames (pass, rush, receiving, special teams) before they are combined,
+    plus the season_type lookup and player info.
+    """
+    mult_lats = get_mult_lats()
+    data = make_play_facts(pbp)
+    role_dfs = aggregate_play_facts(data)
 
     ## Add general stats
 
@@ -568,22 +722,13 @@ def calculate_player_stats(pbp, weekly=False):
     # Select distinct rows based on 'season', 'season_type', and 'week'
     s_type = pbp[['season', 'season_type', 'week']].drop_duplicates()
 
-    #Load the player data
-    player_info = collect_players()
-    #Select specific columns and rename them
-    player_info = player_info[[
-        'gsis_id', 'display_name', 'short_name', 'position', 'position_group', 'headshot'
-    ]].rename(columns={
-        'gsis_id': 'player_id',
-        'display_name': 'player_display_name',
-        'short_name': 'player_name',
-        'headshot': 'headshot_url'
-    })
+    #Load the player data (cached player_id lookup from the players reference snapshot)
+    player_info = get_player_lookup()
     # Filter players for specific positions (RB, FB, HB)
-    racr_ids = player_info[player_info['position'].isin(['RB', 'FB', 'HB'])][['player_id']]
+    racr_ids = player_info[player_info['position'].isin(['RB', 'FB', 'HB'])].reset_index()[['player_id']]
 
     # Passing stats -----------------------------------------------------------
-    pass_df = filter_passing_stats(data)
+    pass_df = role_dfs['pass']
 
     pass_df['dakota'] = 0 ## TODO: Find way to add dakota
 
@@ -591,43 +736,56 @@ def calculate_player_stats(pbp, weekly=False):
     pass_df = process_pass_df(pass_df, pass_two_points)
 
     # Rushing stats -----------------------------------------------------------
-    rush_df = filter_rush_stats(data)
-    rush_lateral_df = filter_rush_lateral_stats(data, mult_lats)
+    rush_df = role_dfs['rush'].rename(columns={'player_id': 'rusher_player_id'})
+    rush_lateral_df = filter_rush_lateral_stats(role_dfs['rush_lateral'], data, mult_lats)
     rush_two_points = filter_rush_two_point_conversions(two_points)
     rush_df = process_rush_df(rush_df, rush_lateral_df, rush_two_points)
 
     # Receiving stats ---------------------------------------------------------
-    receiving_df = filter_receiver_stats(data)
-    receiving_lateral_df = filter_receiver_lateral_stats(data, mult_lats)
+    receiving_df = role_dfs['receiver'].rename(columns={'player_id': 'receiver_player_id'})
+    receiving_lateral_df = filter_receiver_lateral_stats(role_dfs['receiver_lateral'], data, mult_lats)
     receiving_two_points = filter_receiver_two_point_conversions(two_points)
-    rec_team = filter_team_receiving_stats(data)
+    rec_team = role_dfs['team_receiving'].rename(columns={'player_id': 'posteam'})
     receiving_df = process_receiver_df(receiving_df, receiving_lateral_df,rec_team, receiving_two_points, racr_ids)
 
     # Special Teams -----------------------------------------------------------
     # Filter, group, and summarize the data
-    st_tds = (
+    st_plays = (
         pbp[pbp['special'] == 1]  # Filter where special == 1
         .dropna(subset=['td_player_id'])  # Drop rows where td_player_id is NaN
-        .groupby(['td_player_id', 'week', 'season'])  # Group by player_id, week, season
-        .agg(
-            name_st=('td_player_name', custom_mode),
-            team_st=('td_team', custom_mode),
-            opp_st=('defteam', custom_mode),
-            special_teams_tds=('touchdown', 'sum')  # Summarize touchdowns
-        )
+    )
+    st_keys = ['td_player_id', 'week', 'season']  # Group by player_id, week, season
+    st_tds = (
+        pd.concat([
+            groupwise_mode(st_plays, st_keys, {'name_st': 'td_player_name', 'team_st': 'td_team', 'opp_st': 'defteam'}),
+            st_plays.groupby(st_keys).agg(special_teams_tds=('touchdown', 'sum'))  # Summarize touchdowns
+        ], axis=1)
         .reset_index()  # Reset the index to get a DataFrame
         .rename(columns={"td_player_id": "player_id"})  # Rename the player_id column
     )
 
-    player_df = combine_all_stats(pass_df, rush_df, receiving_df, st_tds, s_type)
+    return {
+        'pass': pass_df,
+        'rush': rush_df,
+        'receiving': receiving_df,
+        'special_teams': st_tds,
+        's_type': s_type,
+        'player_info': player_info,
+    }
+
+
+def calculate_player_stats(pbp, weekly=False):
+    blocks = calculate_player_stat_blocks(pbp)
+    player_info = blocks['player_info']
+    player_df = combine_all_stats(blocks['pass'], blocks['rush'], blocks['receiving'], blocks['special_teams'], blocks['s_type'])
 
     # Handle weekly flag
     if not weekly:
         player_df['tgts'] = player_df['targets']
         player_df['rec_air_yds'] = player_df['receiving_air_yards']
 
+        player_names = groupwise_mode(player_df, ['player_id'], {'player_name': 'player_name'})
         player_df = player_df.groupby('player_id').agg({
-            'player_name': custom_mode,
             'recent_team': 'last',
             'completions': 'sum',
             'attempts': 'sum',
@@ -670,7 +828,7 @@ def calculate_player_stats(pbp, weekly=False):
             'special_teams_tds': 'sum',
             'fantasy_points': 'sum',
             'fantasy_points_ppr': 'sum'
-        }).reset_index()
+        }).join(player_names).reset_index()
 
         player_df['racr'] = np.where(
             player_df['receiving_air_yards'] == 0, 0,
@@ -681,14 +839,142 @@ def calculate_player_stats(pbp, weekly=False):
             player_df['passing_yards'] / player_df['passing_air_yards']
         )
 
-    # Join with player info
+    # Join with player info, decoding the categorical lookup columns back to plain values
     player_df = player_df.drop(columns='player_name')
-    player_df = pd.merge(player_df, player_info, on='player_id', how='left')
+    player_df = player_df.join(player_info, on='player_id').reset_index(drop=True)
+    player_df = player_df.astype({col: object for col in player_info.columns if isinstance(player_info[col].dtype, pd.CategoricalDtype)})
 
     return player_df
 
 
 
+###########################################################
+## Sparse Export
+###########################################################
+## Most player-week stats are zero (a receiver has no passing stats), so for ML consumers the stat blocks are
+## scattered straight into a CSR matrix instead of being outer joined and zero filled into a dense frame.
+## An absent entry is 0 in the dense frame, or NaN for PLAYER_GAME_NAN_COLUMNS (whose real zeros are stored).
+## Export with: python -m src.pumps.player_game 2019-2024 (files land in PLAYER_GAME_MATRIX_ROOT, see put_player_game_matrix)
+
+PLAYER_GAME_MATRIX_COLUMNS = PLAYER_GAME_STAT_COLUMNS + ['fantasy_points', 'fantasy_points_ppr']
+PLAYER_GAME_MATRIX_ROOT = './data/pump/player_game_matrix'
+
+
+def make_player_stat_matrix(blocks):
+    """
+    CSR matrix of PLAYER_GAME_MATRIX_COLUMNS for one set of stat blocks (see calculate_player_stat_blocks).
+    Rows are the player-weeks kept by combine_all_stats (player_id and player_name present), sorted by
+    player_id, season, week. Duplicate player-weeks within a block are summed.
+    Entries not stored are 0, except for PLAYER_GAME_NAN_COLUMNS where they are NaN (real zeros are stored).
+    Returns a dict with the matrix and the per row player_id, player_name, recent_team, season, week arrays.
+    """
+    keys = ['player_id', 'week', 'season']
+    stat_blocks = [blocks['pass'], blocks['rush'], blocks['receiving'], blocks['special_teams']]
+    label_names = [('name_pass', 'team_pass'), ('name_rush', 'team_rush'), ('name_receiver', 'team_receiver'), ('name_st', 'team_st')]
+
+    # Only the keys and labels are joined, the stats never go through a dense frame
+    labels = join_stat_blocks(
+        [block[keys + list(names)].drop_duplicates(subset=keys) for block, names in zip(stat_blocks, label_names)],
+        keys, how='outer'
+    )
+    player_name = labels['name_pass'].fillna(labels['name_rush']).fillna(labels['name_receiver']).fillna(labels['name_st'])
+    recent_team = labels['team_pass'].fillna(labels['team_rush']).fillna(labels['team_receiver']).fillna(labels['team_st'])
+    # process_rush_df / process_receiver_df zero fill missing labels, keep only real team abbreviations
+    recent_team = recent_team.where(recent_team.map(lambda team: isinstance(team, str)))
+    keep = (labels['player_id'].notna() & player_name.notna()).to_numpy()
+
+    # Row order of the dense frame (player_id, season, week)
+    order = np.lexsort((labels['week'].to_numpy(), labels['season'].to_numpy(), labels['player_id'].to_numpy()))
+    order = order[keep[order]]
+    row_of_label = np.full(len(labels), -1)
+    row_of_label[order] = np.arange(len(order))
+    label_index = pd.MultiIndex.from_frame(labels[keys])
+
+    column_index = {col: i for i, col in enumerate(PLAYER_GAME_STAT_COLUMNS)}
+    rows, cols, values = [], [], []
+    for block in stat_blocks:
+        block_rows = row_of_label[label_index.get_indexer(pd.MultiIndex.from_frame(block[keys]))]
+        for col in block.columns:
+            if col not in column_index:
+                continue
+            col_values = pd.to_numeric(block[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            # Missing means NaN for PLAYER_GAME_NAN_COLUMNS, so their real zeros are stored explicitly
+            mask = (block_rows >= 0) & ~np.isnan(col_values)
+            if col not in PLAYER_GAME_NAN_COLUMNS:
+                mask &= col_values != 0
+            rows.append(block_rows[mask])
+            cols.append(np.full(mask.sum(), column_index[col]))
+            values.append(col_values[mask])
+
+    shape = (len(order), len(PLAYER_GAME_STAT_COLUMNS))
+    stats = sp.coo_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=shape).tocsr()
+
+    # Fantasy points are linear in the stats, so they come from one sparse product
+    weights = np.zeros(shape[1])
+    for col, weight in FANTASY_POINT_WEIGHTS.items():
+        weights[column_index[col]] = weight
+    fantasy_points = stats @ weights
+    fantasy_points_ppr = fantasy_points + stats[:, column_index['receptions']].toarray().ravel()
+    matrix = sp.hstack([stats, sp.csr_matrix(np.column_stack([fantasy_points, fantasy_points_ppr]))], format='csr')
+
+    return {
+        'matrix': matrix,
+        'player_id': labels['player_id'].to_numpy()[order],
+        'player_name': player_name.to_numpy()[order],
+        'recent_team': recent_team.to_numpy()[order],
+        'season': labels['season'].to_numpy()[order],
+        'week': labels['week'].to_numpy()[order],
+    }
+
+
+def make_player_game_matrix(load_seasons):
+    """
+    Sparse export of the player game pump for load_seasons: the stacked CSR matrix, row index arrays
+    (player_code, team_code, season, week) with their code tables, and column metadata.
+    team_code is -1 where the player-week has no team. column_meta 'missing' is the value of an entry
+    that is not stored in the matrix (do not eliminate_zeros, the 'nan' columns store their zeros).
+    """
+    parts = []
+    for season in load_seasons:
+        pbp = get_play_by_play(season)
+
+        print(f"    Preprocessing player game matrix {datetime.datetime.now()}")
+
+        parts.append(make_player_stat_matrix(calculate_player_stat_blocks(pbp)))
+
+    player_code, player_ids = pd.factorize(np.concatenate([part['player_id'] for part in parts]), sort=True)
+    team_code, teams = pd.factorize(np.concatenate([part['recent_team'] for part in parts]), sort=True)
+    return {
+        'matrix': sp.vstack([part['matrix'] for part in parts], format='csr'),
+        'player_code': player_code.astype(np.int32),
+        'player_ids': np.asarray(player_ids, dtype=str),
+        'team_code': team_code.astype(np.int16),
+        'teams': np.asarray(teams, dtype=str),
+        'season': np.concatenate([part['season'] for part in parts]).astype(np.int16),
+        'week': np.concatenate([part['week'] for part in parts]).astype(np.int8),
+        'columns': PLAYER_GAME_MATRIX_COLUMNS,
+        'column_meta': [
+            {'name': col, 'missing': 'nan' if col in PLAYER_GAME_NAN_COLUMNS else 'zero'}
+            for col in PLAYER_GAME_MATRIX_COLUMNS
+        ],
+    }
+
+
+def put_player_game_matrix(matrix_obj, path):
+    """
+    Write a player game matrix as {path}.npz (CSR), {path}_index.npz (row index arrays and code tables)
+    and {path}_columns.json (column metadata). The CLI writes to {PLAYER_GAME_MATRIX_ROOT}/{start}_{end}.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sp.save_npz(f"{path}.npz", matrix_obj['matrix'])
+    np.savez(
+        f"{path}_index.npz",
+        **{key: matrix_obj[key] for key in ['player_code', 'player_ids', 'team_code', 'teams', 'season', 'week']}
+    )
+    with open(f"{path}_columns.json", 'w') as f:
+        json.dump(matrix_obj['column_meta'], f, indent=2)
+
+
 def make_player_game_feature_store(load_seasons):
     fs = []
     for season in load_seasons:
@@ -700,3 +986,15 @@ def make_player_game_feature_store(load_seasons):
         fs.append(player_df)
 
     return pd.concat(fs, ignore_index=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export player-week stats as a sparse CSR matrix for ML consumers')
+    parser.add_argument('seasons', nargs='+', type=season_range, help='Seasons to export, e.g. 2019-2024 or 2023 2024')
+    parser.add_argument('--output', help=f'Output path prefix (default {PLAYER_GAME_MATRIX_ROOT}/<start>_<end>)')
+    args = parser.parse_args()
+    seasons = parse_seasons(args.seasons)
+    path = args.output or f"{PLAYER_GAME_MATRIX_ROOT}/{min(seasons)}_{max(seasons)}"
+    matrix_obj = make_player_game_matrix(seasons)
+    put_player_game_matrix(matrix_obj, path)
+    print(f"Exported player game matrix {matrix_obj['matrix'].shape} ({matrix_obj['matrix'].nnz} stored values) to {path}.npz")
@@ -0,0 +1,150 @@
+import datetime
+import functools
+import os
+
+import pandas as pd
+
+###########################################################
+## Loaders
+###########################################################
+from src.extracts.pbp import load_mult_lats
+from src.extracts.player_stats import collect_players
+
+## Reference tables (players, player_info, mult_lats) do not change per season, so they are snapshotted
+## into data/pump/reference/<table>/<version>.parquet and loaded once per process. Runs read the latest
+## snapshot and only go to the network when no snapshot exists or the latest one is older than
+## REFERENCE_MAX_AGE_DAYS (rookies/position changes and new laterals land weekly in season).
+
+REFERENCE_ROOT = './data/pump/reference'
+REFERENCE_MAX_AGE_DAYS = 7
+# Snapshot versions kept per table, older ones are deleted (the workflow commits data/ every night)
+REFERENCE_KEEP_VERSIONS = 2
+
+PLAYER_INFO_URL = "https://github.com/nflverse/nflverse-data/releases/download/players/player_info.csv"
+
+REFERENCE_TABLES = {
+    'players': collect_players,
+    'player_info': lambda: pd.read_csv(PLAYER_INFO_URL),
+    'mult_lats': load_mult_lats,
+}
+
+
+def get_reference_versions(name, root_path=REFERENCE_ROOT):
+    path = f"{root_path}/{name}"
+    if not os.path.exists(path):
+        return []
+    return sorted(file_name.split('.')[0] for file_name in os.listdir(path) if file_name.endswith('.parquet'))
+
+
+def snapshot_reference_data(names=None, root_path=REFERENCE_ROOT, version=None):
+    """
+    Fetch the reference tables and write them as versioned parquet snapshots.
+    The version stamp defaults to today's date (YYYYMMDD), and only the latest REFERENCE_KEEP_VERSIONS versions
+    of each table are kept. Returns a dict of table -> version.
+    """
+    version = version or datetime.datetime.utcnow().strftime('%Y%m%d')
+    versions = {}
+    for name in names or REFERENCE_TABLES.keys():
+        df = REFERENCE_TABLES[name]()
+        os.makedirs(f"{root_path}/{name}", exist_ok=True)
+        df.to_parquet(f"{root_path}/{name}/{version}.parquet", engine='pyarrow', index=False)
+        versions[name] = version
+        print(f"    Snapshot reference table {name} ({version}): {len(df)} rows")
+        for old_version in get_reference_versions(name, root_path)[:-REFERENCE_KEEP_VERSIONS]:
+            if old_version != version:
+                os.remove(f"{root_path}/{name}/{old_version}.parquet")
+    # Loaded tables are stale once a new snapshot is written
+    load_reference_table.cache_clear()
+    get_player_lookup.cache_clear()
+    get_esb_id_map.cache_clear()
+    get_mult_lats.cache_clear()
+    return versions
+
+
+def get_reference_age_days(version):
+    """
+    Age in days of a YYYYMMDD snapshot version, None when the version is not a date stamp.
+    """
+    try:
+        return (datetime.datetime.utcnow() - datetime.datetime.strptime(version, '%Y%m%d')).days
+    except ValueError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def load_reference_table(name, root_path=REFERENCE_ROOT, version=None, max_age_days=REFERENCE_MAX_AGE_DAYS):
+    """
+    Load a reference table snapshot (latest unless a version is given). A new snapshot is taken first when
+    none exists or the latest is older than max_age_days; if that fetch fails the stale snapshot is used.
+    Cached so every pump and pipeline stage in the process shares one copy.
+    """
+    versions = get_reference_versions(name, root_path)
+    if version is None:
+        age = get_reference_age_days(versions[-1]) if versions else None
+        if not versions:
+            version = snapshot_reference_data([name], root_path)[name]
+        elif age is None or age > max_age_days:
+            try:
+                version = snapshot_reference_data([name], root_path)[name]
+            except Exception as e:
+                print(f"    Reference table {name} refresh failed ({e}), using stale snapshot {versions[-1]}")
+                version = versions[-1]
+        else:
+            version = versions[-1]
+    elif version not in versions:
+        raise FileNotFoundError(f"No {name} reference snapshot for version {version} in {root_path}")
+    return pd.read_parquet(f"{root_path}/{name}/{version}.parquet", engine='pyarrow')
+
+
+@functools.lru_cache(maxsize=None)
+def get_player_lookup(root_path=REFERENCE_ROOT):
+    """
+    player_id -> player attributes, with the repeated string columns stored as categorical codes.
+    """
+    players = load_reference_table('players', root_path)
+    players = players[[
+        'gsis_id', 'display_name', 'short_name', 'position', 'position_group', 'headshot'
+    ]].rename(columns={
+        'gsis_id': 'player_id',
+        'display_name': 'player_display_name',
+        'short_name': 'player_name',
+        'headshot': 'headshot_url'
+    })
+    players = players.dropna(subset=['player_id']).drop_duplicates(subset=['player_id'])
+    for col in ['player_display_name', 'player_name', 'position', 'position_group']:
+        players[col] = players[col].astype('category')
+    return players.set_index('player_id')
+
+
+@functools.lru_cache(maxsize=None)
+def get_esb_id_map(root_path=REFERENCE_ROOT):
+    players = load_reference_table('player_info', root_path)
+    return dict(zip(players['esb_id'], players['gsis_id']))
+
+
+@functools.lru_cache(maxsize=None)
+def get_mult_lats(root_path=REFERENCE_ROOT):
+    """
+    Aggregated multiple lateral yards indexed (and sorted) by season/week.
+    """
+    mult_lats = load_reference_table('mult_lats', root_path)
+    mult_lats = mult_lats.astype({'type': 'category'})
+    return mult_lats.set_index(['season', 'week']).sort_index()
+
+
+def select_mult_lats(mult_lats, lat_type, seasons, weeks):
+    """
+    Rows of the indexed mult_lats for a lateral type whose season and week are in the given values.
+    """
+    season_values = mult_lats.index.get_level_values('season')
+    week_values = mult_lats.index.get_level_values('week')
+    selected = mult_lats[
+        (mult_lats['type'] == lat_type) &
+        season_values.isin(pd.unique(seasons)) &
+        week_values.isin(pd.unique(weeks))
+    ]
+    return selected.reset_index()
+
+
+if __name__ == '__main__':
+    snapshot_reference_data()
@@ -0,0 +1,118 @@
+import functools
+import re
+
+## Schema registry built from the markdown data dictionaries in data/data_dictionaries.
+## Every table with a `column` header contributes column specs:
+### - dtype from a `dtype` column
+### - nullability from a `nullable` column (yes/no, default yes)
+### - allowed range from a `range` column (`min..max`, either side may be open)
+## A cell can declare several columns (`home_team` / `away_team`) and patterns (`avg_fantasy_points{_*}`, `avg_q{1‑5}_points`).
+
+DICTIONARY_ROOT = './data/data_dictionaries'
+
+FEATURE_STORE_SCHEMAS = {
+    'event/regular_season_game': {
+        'dictionary': 'event_feature_store.md',
+        # Dictionary entries are generic, the store columns add a team side and phase of play
+        'prefixes': ['home_', 'away_'],
+        'suffixes': ['_offense', '_defense', '_rank'],
+    },
+    'player/fantasy': {
+        'dictionary': 'fantasy_feature_store.md',
+        'prefixes': [],
+        'suffixes': [],
+    },
+}
+
+# Declared dtype -> accepted numpy dtype kinds. Integer columns pick up NaNs and become floats (or nullable Int64/Float64)
+DTYPE_KINDS = {
+    'int64': 'iuf',
+    'float64': 'iuf',
+    'bool': 'b',
+    'object': 'OSU',
+}
+
+_RANGE_PATTERN = re.compile(r'^\s*(-?[\d.]*)\s*\.\.\s*(-?[\d.]*)\s*$')
+
+
+def _split_row(line):
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+
+def _column_pattern(name):
+    """
+    Regex for one declared column name, expanding the dictionary placeholders.
+    """
+    pattern = ''
+    for part in re.split(r'(\{[^}]*\})', name):
+        if part == '{_*}':
+            pattern += r'(?:_\w+)?'
+        elif part.startswith('{') and part.endswith('}'):
+            # Numeric ranges like {1‑5} (dictionaries use a non-breaking hyphen)
+            low, high = re.split(r'[-‑–]', part[1:-1])
+            pattern += '(?:' + '|'.join(str(i) for i in range(int(low), int(high) + 1)) + ')'
+        else:
+            pattern += re.escape(part)
+    return pattern
+
+
+def _parse_range(value):
+    match = _RANGE_PATTERN.match(value or '')
+    if not value or match is None:
+        return None, None
+    low, high = match.groups()
+    return (float(low) if low else None), (float(high) if high else None)
+
+
+def parse_data_dictionary(path):
+    """
+    Parse every `column` table in a data dictionary into {pattern: spec}. Later tables update earlier specs.
+    """
+    specs = {}
+    header = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip().startswith('|'):
+                header = None
+                continue
+            cells = _split_row(line)
+            if header is None:
+                header = [cell.lower() for cell in cells] if cells[0].lower() == 'column' else []
+                continue
+            if not header or set(''.join(cells)) <= set('-: '):
+                continue
+            row = dict(zip(header, cells))
+            for name in re.findall(r'`([^`]+)`', row.get('column', '')):
+                spec = specs.setdefault(_column_pattern(name), {'column': name, 'dtype': None, 'nullable': True, 'min': None, 'max': None})
+                if row.get('dtype'):
+                    spec['dtype'] = row['dtype']
+                if row.get('nullable'):
+                    spec['nullable'] = row['nullable'].lower() not in ('no', 'false', 'n')
+                if row.get('range'):
+                    spec['min'], spec['max'] = _parse_range(row['range'])
+    return specs
+
+
+@functools.lru_cache(maxsize=None)
+def get_feature_store_schema(feature_store_name, dictionary_root=DICTIONARY_ROOT):
+    """
+    Compiled schema for a feature store, or None when the store has no registered dictionary.
+    Returns a list of (compiled regex, spec) in dictionary order; a column takes the first spec it matches.
+    """
+    meta = FEATURE_STORE_SCHEMAS.get(feature_store_name)
+    if meta is None:
+        return None
+    specs = parse_data_dictionary(f"{dictionary_root}/{meta['dictionary']}")
+    prefix = '(?:' + '|'.join(re.escape(p) for p in meta['prefixes']) + ')?' if meta['prefixes'] else ''
+    suffix = ''.join('(?:' + re.escape(s) + ')?' for s in meta['suffixes'])
+    return [(re.compile(f'^{prefix}{pattern}{suffix}$'), spec) for pattern, spec in specs.items()]
+
+
+def match_columns(schema, columns):
+    """
+    Map each column to its spec. Columns without a declared spec map to None.
+    """
+    matched = {}
+    for col in columns:
+        matched[col] = next((spec for regex, spec in schema if regex.match(col)), None)
+    return matched
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.schemas.registry import DTYPE_KINDS, get_feature_store_schema, match_columns
+
+## Validation gate run on a built feature store before any season is written.
+## All checks are column level reductions (dtype kind, null counts and min/max grouped by season),
+## so a full build validates in milliseconds and a bad build fails before 20+ seasons are rewritten.
+
+
+def _stored_columns(root_path, feature_store_name):
+    """
+    Column names of the latest season already in the store (parquet footer only), or None for a new store.
+    """
+    path = f"{root_path}/{feature_store_name}"
+    if not os.path.exists(path):
+        return None
+    seasons = sorted(int(file_name.split('.')[0]) for file_name in os.listdir(path) if file_name.split('.')[0].isdigit())
+    if not seasons:
+        return None
+    schema = pq.read_schema(f"{path}/{seasons[-1]}.parquet")
+    return [name for name in schema.names if not name.startswith('__index_level_')]
+
+
+def validate_feature_store(feature_store_name, df, root_path='./data/feature_store', allow_drift=False):
+    """
+    Validate a built feature store against its registered schema and the columns already in the store.
+    Returns a list of violations {'season', 'column', 'check', 'detail'} (season is None for store level checks).
+    """
+    violations = []
+
+    # Column drift against what is already stored
+    if not allow_drift:
+        stored = _stored_columns(root_path, feature_store_name)
+        if stored is not None:
+            for col in sorted(set(stored) - set(df.columns)):
+                violations.append({'season': None, 'column': col, 'check': 'drift', 'detail': 'column missing from build'})
+            for col in sorted(set(df.columns) - set(stored)):
+                violations.append({'season': None, 'column': col, 'check': 'drift', 'detail': 'column not in stored schema'})
+
+    schema = get_feature_store_schema(feature_store_name)
+    if schema is None:
+        return violations
+    specs = {col: spec for col, spec in match_columns(schema, df.columns).items() if spec is not None}
+
+    # Dtype kinds
+    for col, spec in specs.items():
+        kinds = DTYPE_KINDS.get(spec['dtype'])
+        if kinds is not None and df[col].dtype.kind not in kinds:
+            violations.append({'season': None, 'column': col, 'check': 'dtype', 'detail': f"{df[col].dtype} (declared {spec['dtype']})"})
+
+    seasons = df['season']
+
+    # Nullability
+    not_null = [col for col, spec in specs.items() if not spec['nullable']]
+    if not_null:
+        null_counts = df[not_null].isna().groupby(seasons).sum()
+        for (season, col), count in null_counts.stack().items():
+            if count > 0:
+                violations.append({'season': season, 'column': col, 'check': 'nullable', 'detail': f'{count} nulls'})
+
+    # Allowed ranges, comparing per season min/max against the bounds
+    bounded = [col for col, spec in specs.items() if (spec['min'] is not None or spec['max'] is not None) and df[col].dtype.kind in 'iuf']
+    if bounded:
+        grouped = df[bounded].groupby(seasons)
+        mins, maxs = grouped.min().astype(float), grouped.max().astype(float)
+        lows = pd.Series({col: specs[col]['min'] if specs[col]['min'] is not None else -np.inf for col in bounded})
+        highs = pd.Series({col: specs[col]['max'] if specs[col]['max'] is not None else np.inf for col in bounded})
+        for (season, col), below in mins.lt(lows).stack().items():
+            if below:
+                violations.append({'season': season, 'column': col, 'check': 'range', 'detail': f'min {mins.at[season, col]} < {lows[col]}'})
+        for (season, col), above in maxs.gt(highs).stack().items():
+            if above:
+                violations.append({'season': season, 'column': col, 'check': 'range', 'detail': f'max {maxs.at[season, col]} > {highs[col]}'})
+    return violations
+
+
+def format_violations(feature_store_name, violations):
+    lines = [f"Schema violations for {feature_store_name}: {len(violations)}"]
+    for violation in violations:
+        season = violation['season'] if violation['season'] is not None else 'all'
+        lines.append(f"    [{season}] {violation['column']}: {violation['check']} - {violation['detail']}")
+    return '\n'.join(lines)
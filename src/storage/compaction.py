@@ -0,0 +1,194 @@
+import argparse
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils import find_year_for_season
+
+## Optional compaction of a feature store. Completed seasons are rolled into a single parquet file sorted by
+## season/week with row groups aligned to season/week boundaries, column statistics and page indexes, so readers
+## can skip row groups on season/week filters and the dictionaries/compression span every year. The active season
+## stays as its own file in the store so the nightly upsert keeps writing to it.
+## Each compacted season records a fingerprint of its source season file (row count and parquet footer hash), so a
+## season rewritten in the store after compaction is read from the store instead (mtimes do not survive a clone).
+
+ROOT_PATH = './data/feature_store'
+COMPACTED_ROOT = './data/feature_store_compacted'
+COMPACTED_FILE = 'compacted.parquet'
+# Whole weeks are packed into a row group until it reaches this many rows. A row group of a few hundred rows
+# (one event store week is ~16 games) costs more in footer/page index overhead than it saves in skipping.
+MIN_ROW_GROUP_ROWS = 5000
+
+
+def get_store_seasons(root_path, feature_store_name):
+    path = f"{root_path}/{feature_store_name}"
+    if not os.path.exists(path):
+        return []
+    return sorted(int(file_name.split('.')[0]) for file_name in os.listdir(path) if file_name.split('.')[0].isdigit())
+
+
+def get_compacted_seasons(feature_store_name, compacted_root=COMPACTED_ROOT):
+    path = f"{compacted_root}/{feature_store_name}/{COMPACTED_FILE}"
+    if not os.path.exists(path):
+        return []
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata.get(b'compacted_seasons', b'[]'))
+
+
+def get_compacted_sources(feature_store_name, compacted_root=COMPACTED_ROOT):
+    """
+    season -> fingerprint of the season file each compacted season was built from.
+    """
+    path = f"{compacted_root}/{feature_store_name}/{COMPACTED_FILE}"
+    if not os.path.exists(path):
+        return {}
+    metadata = pq.read_schema(path).metadata or {}
+    return {int(season): fingerprint for season, fingerprint in json.loads(metadata.get(b'compacted_sources', b'{}')).items()}
+
+
+def get_season_fingerprint(path):
+    """
+    Row count and sha1 of the parquet footer (schema, row group offsets and column statistics) of a season file.
+    """
+    with open(path, 'rb') as f:
+        f.seek(-8, os.SEEK_END)
+        footer_length = int.from_bytes(f.read(4), 'little')
+        f.seek(-8 - footer_length, os.SEEK_END)
+        footer = f.read(footer_length)
+    return f"{pq.read_metadata(path).num_rows}:{hashlib.sha1(footer).hexdigest()}"
+
+
+def get_row_group_sizes(df, row_group_keys, min_rows=MIN_ROW_GROUP_ROWS):
+    """
+    Row group sizes for a frame sorted by row_group_keys. A row group never splits a key group and never spans
+    two values of the first key (season); consecutive key groups are packed together until min_rows is reached.
+    """
+    group_sizes = df.groupby(row_group_keys, sort=True).size()
+    first_keys = group_sizes.index.get_level_values(0) if len(row_group_keys) > 1 else group_sizes.index
+    sizes = []
+    current_key, current_size = None, 0
+    for key, size in zip(first_keys, group_sizes.to_numpy()):
+        if current_size and (key != current_key or current_size >= min_rows):
+            sizes.append(current_size)
+            current_size = 0
+        current_key = key
+        current_size += size
+    if current_size:
+        sizes.append(current_size)
+    return sizes
+
+
+def compact_feature_store(feature_store_name, root_path=ROOT_PATH, compacted_root=COMPACTED_ROOT, active_season=None, row_group_keys=('season', 'week'), min_row_group_rows=MIN_ROW_GROUP_ROWS, remove_seasons=False):
+    """
+    Roll every completed season of a store into {compacted_root}/{feature_store_name}/compacted.parquet.
+    - row_group_keys: row groups are aligned to these keys (see get_row_group_sizes)
+    - min_row_group_rows: pass 0 for exactly one row group per key group
+    - remove_seasons: delete the per season files once they are in the compacted file
+    Returns the compacted seasons.
+    """
+    active_season = active_season or find_year_for_season()
+    seasons = [season for season in get_store_seasons(root_path, feature_store_name) if season < active_season]
+    # Seasons already compacted (and removed from the store) are carried over from the existing file
+    previous = [season for season in get_compacted_seasons(feature_store_name, compacted_root) if season not in seasons]
+    if not seasons:
+        print(f"No completed seasons to compact for {feature_store_name}")
+        return previous
+
+    path = f"{compacted_root}/{feature_store_name}/{COMPACTED_FILE}"
+    frames = [pd.read_parquet(f"{root_path}/{feature_store_name}/{season}.parquet", engine='pyarrow') for season in seasons]
+    if previous:
+        frames.append(read_feature_store(feature_store_name, seasons=previous, root_path=root_path, compacted_root=compacted_root))
+    row_group_keys = list(row_group_keys)
+    df = pd.concat(frames, ignore_index=True).sort_values(row_group_keys, kind='stable').reset_index(drop=True)
+
+    compacted_seasons = sorted(seasons + previous)
+    previous_sources = get_compacted_sources(feature_store_name, compacted_root)
+    sources = {
+        **{str(season): previous_sources[season] for season in previous if season in previous_sources},
+        **{str(season): get_season_fingerprint(f"{root_path}/{feature_store_name}/{season}.parquet") for season in seasons},
+    }
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'compacted_seasons': json.dumps(compacted_seasons).encode(),
+        b'compacted_sources': json.dumps(sources).encode(),
+    })
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    row_group_sizes = get_row_group_sizes(df, row_group_keys, min_row_group_rows)
+    with pq.ParquetWriter(tmp_path, table.schema, compression='zstd', write_statistics=True, write_page_index=True) as writer:
+        offset = 0
+        for size in row_group_sizes:
+            writer.write_table(table.slice(offset, size), row_group_size=size)
+            offset += size
+    # Swap in the new file only once it is fully written
+    os.replace(tmp_path, path)
+    print(f"Compacted {feature_store_name} seasons {min(compacted_seasons)}-{max(compacted_seasons)} into {path} ({len(row_group_sizes)} row groups)")
+
+    if remove_seasons:
+        # The latest season file stays in the store, get_seasons_to_update anchors on it
+        latest_season = max(get_store_seasons(root_path, feature_store_name))
+        for season in seasons:
+            if season != latest_season:
+                os.remove(f"{root_path}/{feature_store_name}/{season}.parquet")
+    return compacted_seasons
+
+
+def get_fresh_compacted_seasons(feature_store_name, root_path=ROOT_PATH, compacted_root=COMPACTED_ROOT):
+    """
+    Compacted seasons whose per season file is gone from the store or unchanged since it was compacted.
+    The store keeps its latest season file (and refreshes/backfills rewrite seasons), so changed ones are read from the store.
+    """
+    compacted_seasons = get_compacted_seasons(feature_store_name, compacted_root)
+    sources = get_compacted_sources(feature_store_name, compacted_root)
+    fresh = []
+    for season in compacted_seasons:
+        path = f"{root_path}/{feature_store_name}/{season}.parquet"
+        if not os.path.exists(path) or sources.get(season) == get_season_fingerprint(path):
+            fresh.append(season)
+    return fresh
+
+
+def read_feature_store(feature_store_name, seasons=None, weeks=None, columns=None, root_path=ROOT_PATH, compacted_root=COMPACTED_ROOT):
+    """
+    Read a store from the compacted file plus any per season files not in it (or rewritten since it was compacted).
+    Season/week filters are pushed down so non matching row groups in the compacted file are skipped.
+    """
+    compacted_seasons = get_fresh_compacted_seasons(feature_store_name, root_path, compacted_root)
+    filters = []
+    if seasons is not None:
+        filters.append(('season', 'in', list(seasons)))
+    if weeks is not None:
+        filters.append(('week', 'in', list(weeks)))
+
+    frames = []
+    read_seasons = compacted_seasons if seasons is None else [season for season in compacted_seasons if season in seasons]
+    if read_seasons:
+        path = f"{compacted_root}/{feature_store_name}/{COMPACTED_FILE}"
+        compacted_filters = [('season', 'in', read_seasons)] + [f for f in filters if f[0] != 'season']
+        frames.append(pq.read_table(path, columns=columns, filters=compacted_filters).to_pandas())
+
+    for season in get_store_seasons(root_path, feature_store_name):
+        if season in compacted_seasons or (seasons is not None and season not in seasons):
+            continue
+        frames.append(pd.read_parquet(f"{root_path}/{feature_store_name}/{season}.parquet", engine='pyarrow', columns=columns, filters=filters or None))
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compact completed feature store seasons into one parquet file')
+    parser.add_argument('feature_stores', nargs='+', help="Feature store names, e.g. 'event/regular_season_game'")
+    parser.add_argument('--row-group-keys', nargs='+', default=['season', 'week'], help='Columns each row group is aligned to')
+    parser.add_argument('--min-row-group-rows', type=int, default=MIN_ROW_GROUP_ROWS, help='Pack whole key groups into row groups of at least this many rows')
+    parser.add_argument('--remove-seasons', action='store_true', help='Delete the per season files once compacted')
+    args = parser.parse_args()
+    for name in args.feature_stores:
+        compact_feature_store(name, row_group_keys=args.row_group_keys, min_row_group_rows=args.min_row_group_rows, remove_seasons=args.remove_seasons)
@@ -0,0 +1,41 @@
+import argparse
+import datetime
+import os
+
+## Season helpers shared by the runner, the pumps and the storage tools. Standard library only so the
+## runner can plan without importing nfl_data_loader (which pulls in pandas).
+
+
+def find_year_for_season(date=None):
+    """
+    Current NFL season (rolls over in May), same as nfl_data_loader.utils.utils.find_year_for_season.
+    """
+    today = date or datetime.datetime.utcnow()
+    return today.year if today.month >= 5 else today.year - 1
+
+
+def get_seasons_to_update(root_path, feature_store_name):
+    """
+    Latest stored season through the current season (from 2002 for a new store), same as
+    nfl_data_loader.utils.utils.get_seasons_to_update.
+    """
+    path = f"{root_path}/{feature_store_name}"
+    stored = [int(file_name.split('.')[0]) for file_name in os.listdir(path)] if os.path.exists(path) else []
+    return list(range(max(stored, default=2002), find_year_for_season() + 1))
+
+
+def season_range(value):
+    """
+    argparse type for a --seasons value, a season (2004) or an inclusive range (2004-2014).
+    """
+    start, sep, end = value.partition('-')
+    if not start.isdigit() or (sep and (not end.isdigit() or int(end) < int(start))):
+        raise argparse.ArgumentTypeError(f"invalid season or season range: '{value}' (e.g. 2004 or 2004-2014)")
+    return list(range(int(start), int(end or start) + 1))
+
+
+def parse_seasons(values):
+    """
+    Seasons from CLI arguments, a flat sorted list of the season_range values.
+    """
+    return sorted({season for seasons in values or [] for season in seasons})